@@ -1,20 +1,25 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 import time
 
+from .db_pool import PoolMetrics, pool_options
+
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 MAX_RETRIES = 10  # Number of attempts
 RETRY_DELAY = 5  # Seconds between retries
 
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
 
 def get_db_connection():
     for attempt in range(1, MAX_RETRIES + 1):
         try:
-            engine = create_engine(
-                SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, pool_recycle=300
-            )
+            engine = create_engine(SQLALCHEMY_DATABASE_URL, **pool_options(SQLALCHEMY_DATABASE_URL, sync_pool_metrics))
+            sync_pool_metrics.attach(engine.pool)
             # Test a quick connection
             conn = engine.connect()
             conn.close()
@@ -39,8 +44,42 @@ Base = declarative_base()
 
 
 def get_db():
+    """Blocking session, for scripts and other non-async callers."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching asyncio driver."""
+    scheme, sep, rest = url.partition("://")
+    driver = scheme.split("+", 1)[0]
+    if driver in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, async_pool_metrics))
+async_pool_metrics.attach(async_engine.sync_engine.pool)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_db():
+    """Non-blocking session used by the API endpoints."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def db_pool_stats() -> dict:
+    return {
+        "async": async_pool_metrics.stats(async_engine.sync_engine.pool),
+        "sync": sync_pool_metrics.stats(engine.pool),
+    }
@@ -0,0 +1,146 @@
+"""
+Connection pool sizing and instrumentation.
+
+Every engine is built from the same DB_POOL_* settings, and its pool reports how
+many connections are checked out, how far into overflow it is, how long callers
+waited to get a connection and how often pre-ping found a dead one.
+"""
+from threading import Lock
+import os
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from .metrics import Histogram
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Seconds a request may wait for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 300))
+
+# Waiting for a connection should be far below the HTTP latency buckets, so
+# start finer than the default histogram.
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class PoolMetrics:
+    """Counters and a checkout wait histogram for one engine's pool."""
+
+    def __init__(self):
+        self.wait_time = Histogram(WAIT_BUCKETS)
+        self._lock = Lock()
+        self._counts = {
+            "connects": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "timeouts": 0,
+            "pre_ping_failures": 0,
+            "invalidations": 0,
+        }
+        # Tracked from the pool events, since only QueuePool reports it itself
+        self.checked_out = 0
+        self.max_checked_out = 0
+        # Limits the pool was built with; filled in by pool_options()
+        self.limits: dict = {}
+
+    def count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def attach(self, pool):
+        """Subscribe to the pool's events; listeners survive pool.recreate()."""
+
+        @event.listens_for(pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self.count("connects")
+
+        @event.listens_for(pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self._counts["checkouts"] += 1
+                self.checked_out += 1
+                self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+        @event.listens_for(pool, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self._counts["checkins"] += 1
+                self.checked_out -= 1
+
+        @event.listens_for(pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            # A failed pre-ping surfaces as a DisconnectionError raised on checkout
+            if isinstance(exception, exc.DisconnectionError):
+                self.count("pre_ping_failures")
+            else:
+                self.count("invalidations")
+
+    def stats(self, pool) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            checked_out = self.checked_out
+            max_checked_out = self.max_checked_out
+        stats = {"pool_class": type(pool).__bases__[-1].__name__, **self.limits}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                checked_in=pool.checkedin(),
+                # Negative until pool_size connections have been opened
+                overflow=pool.overflow(),
+            )
+        stats.update(
+            checked_out=checked_out,
+            max_checked_out=max_checked_out,
+            **counts,
+            wait_time=self.wait_time.snapshot(),
+        )
+        return stats
+
+
+class _TimedCheckout:
+    """Pool mixin timing how long each checkout waits on the pool's queue."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.count("timeouts")
+            raise
+        finally:
+            self.metrics.wait_time.observe(time.perf_counter() - started)
+
+
+def instrumented_pool_class(base, metrics: PoolMetrics):
+    # Bound on the class rather than the instance: engine.dispose() rebuilds the
+    # pool from its class.
+    return type(f"Instrumented{base.__name__}", (_TimedCheckout, base), {"metrics": metrics})
+
+
+def pool_options(url: str, metrics: PoolMetrics) -> dict:
+    """Keyword arguments for create_engine / create_async_engine."""
+    url = make_url(url)
+    # Keep the pool class the driver would have picked (aiosqlite, for one,
+    # cannot share connections between event loops and uses NullPool).
+    base = url.get_dialect().get_pool_class(url)
+    options = {
+        "poolclass": instrumented_pool_class(base, metrics),
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+    if issubclass(base, QueuePool):
+        metrics.limits = {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "timeout_seconds": DB_POOL_TIMEOUT,
+        }
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
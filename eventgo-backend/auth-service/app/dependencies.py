@@ -1,13 +1,16 @@
 from datetime import datetime, timedelta
+import os
+import uuid
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import HTTPException, status, Depends, Request, Response
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .token_blacklist import is_token_blacklisted  # NEW: Import the blacklist checker
 
-from .database import get_db
+from .database import get_async_db, get_db
 from . import models
+from .user_cache import CachedUser, user_cache
 
 # If you prefer to read these from environment variables, you could do:
 # import os
@@ -16,7 +19,10 @@ SECRET_KEY = "your_super_secret_key_here"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# "db" looks the user up on every request; "stateless" trusts the signed claims
+# and only reads the users table when the user is not in the local cache.
+TOKEN_VALIDATION_MODE = os.getenv("TOKEN_VALIDATION_MODE", "db").lower()
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 
@@ -33,7 +39,8 @@ def create_access_token(data: dict):
     """Generate a JWT token with an expiration."""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti gives the blacklist a short, unique key for this token
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     
     # Fetch user ID if it's not already included
     if "user_id" not in to_encode and "sub" in to_encode:
@@ -47,7 +54,7 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)):
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)):
     token = request.cookies.get("access_token")
     if not token:
         raise HTTPException(
@@ -81,9 +88,36 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
     except JWTError:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await resolve_user(db, email)
     if not user:
         raise credentials_exception
 
     return user
 
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+
+async def resolve_user(db: AsyncSession, email: str):
+    """
+    Return the user that a validated token refers to.
+
+    In "stateless" mode the result comes from the user cache and the database is
+    only queried on a miss; the returned object is a detached CachedUser.
+    """
+    if TOKEN_VALIDATION_MODE != "stateless":
+        return await get_user_by_email(db, email)
+
+    cached = user_cache.get(email)
+    if cached is not None:
+        return cached
+
+    user = await get_user_by_email(db, email)
+    if user is None:
+        return None
+    cached = CachedUser.from_model(user)
+    user_cache.put(cached)
+    return cached
+
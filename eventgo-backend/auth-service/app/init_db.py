@@ -1,8 +1,30 @@
+from sqlalchemy import text
+
 from .database import engine
 from . import models
 
+# Indexes behind /search-users. Postgres only; other databases fall back to scans.
+SEARCH_INDEX_DDL = [
+    # pg_trgm is a trusted extension (PG13+), so the database owner can create it
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # Substring search: email ILIKE '%term%'
+    "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (email gin_trgm_ops)",
+    # Prefix autocomplete: lower(email) LIKE 'term%', independent of the DB collation
+    "CREATE INDEX IF NOT EXISTS ix_users_email_lower_prefix ON users (lower(email) text_pattern_ops)",
+]
+
+
+def create_search_indexes(bind=engine):
+    if bind.dialect.name != "postgresql":
+        return
+    with bind.begin() as conn:
+        for ddl in SEARCH_INDEX_DDL:
+            conn.execute(text(ddl))
+
+
 def init_db():
     models.Base.metadata.create_all(bind=engine)
+    create_search_indexes(engine)
 
 if __name__ == "__main__":
-    init_db() 
\ No newline at end of file
+    init_db()
@@ -1,26 +1,44 @@
-from fastapi import FastAPI, Depends, HTTPException, Response, status, Request
+import hashlib
+import json
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from jose import JWTError, jwt  # Move third-party imports up
 
 from . import models, schemas
-from .database import engine, get_db
+from .database import AsyncSessionLocal, db_pool_stats, engine, get_async_db
 from .schemas import TokenValidationRequest
 from .dependencies import (
-    get_db,
     create_access_token,
     get_current_user,
+    get_user_by_email,
+    resolve_user,
     SECRET_KEY,
     ALGORITHM,
 )
 
 from .database import engine
+from .init_db import init_db
+from .password_hashing import (
+    HashPoolSaturated,
+    hash_password,
+    hash_pool,
+    verify_and_update_password,
+)
 from .token_blacklist import is_token_blacklisted, add_to_blacklist
+from .user_cache import user_cache
 
 app = FastAPI(title="Auth Service")
 
+USERS_PAGE_SIZE = 100
+USERS_MAX_PAGE_SIZE = 1000
+USERS_STREAM_BATCH_SIZE = 1000
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,18 +48,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(HashPoolSaturated)
+async def hash_pool_saturated_handler(request: Request, exc: HashPoolSaturated):
+    """Shed load quickly instead of queueing logins behind a full hashing pool."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many concurrent login attempts, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
 # Initialize database
-models.Base.metadata.create_all(bind=engine)
+init_db()
 
 
 from sqlalchemy.sql import text  # Import text for raw SQL execution
 
 
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """Health check endpoint to verify service and database connectivity."""
     try:
-        db.execute(text("SELECT 1"))  # Wrap SQL query with text()
+        await db.execute(text("SELECT 1"))  # Wrap SQL query with text()
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         import traceback
@@ -50,22 +77,76 @@ async def health_check(db: Session = Depends(get_db)):
         print(f"❌ Health check failed: {error_details}")  # Print error in logs
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def get_metrics():
+    """Runtime counters used to size caches and pools."""
+    return {
+        "user_cache": user_cache.stats(),
+        "hash_pool": hash_pool.stats(),
+        "db_pool": db_pool_stats(),
+    }
+
 @app.get("/users", response_model=list[schemas.UserResponse])
-async def get_all_users(db: Session = Depends(get_db)):
+async def get_all_users(
+    response: Response,
+    limit: int = Query(USERS_PAGE_SIZE, ge=1, le=USERS_MAX_PAGE_SIZE),
+    after_id: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Retrieve a list of all users.
+    Retrieve users one page at a time, ordered by id.
+    Pass the X-Next-Cursor header of a response as ?after_id= to get the next page;
+    the header is absent on the last page. Use /users/stream to export everyone.
     """
-    users = db.query(models.User).all()
+    query = select(models.User).order_by(models.User.id).limit(limit)
+    if after_id is not None:
+        query = query.where(models.User.id > after_id)
+    result = await db.execute(query)
+    users = result.scalars().all()
+    if len(users) == limit:
+        response.headers["X-Next-Cursor"] = str(users[-1].id)
     return users
 
+
+@app.get("/users/stream")
+async def stream_all_users():
+    """
+    Stream every user as NDJSON (one UserResponse per line).
+    Rows are fetched from a server-side cursor in batches of USERS_STREAM_BATCH_SIZE,
+    so memory stays flat however large the table is.
+    """
+    return StreamingResponse(_iter_users_ndjson(), media_type="application/x-ndjson")
+
+
+async def _iter_users_ndjson():
+    # Plain column rows rather than ORM entities, so nothing accumulates in the session
+    columns = (
+        models.User.id,
+        models.User.email,
+        models.User.full_name,
+        models.User.is_active,
+        models.User.role,
+    )
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(*columns)
+            .order_by(models.User.id)
+            .execution_options(yield_per=USERS_STREAM_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield "".join(
+                schemas.UserResponse.model_validate(row).model_dump_json() + "\n" for row in rows
+            )
+
+
 @app.post("/register")
-async def register_user(user: schemas.UserCreate, response: Response, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register_user(user: schemas.UserCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
+    db_user = await get_user_by_email(db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Hash the password and create the user
-    hashed_password = models.User.get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = models.User(
         email=user.email,
         full_name=user.full_name,  # NEW: Full name
@@ -73,11 +154,13 @@ async def register_user(user: schemas.UserCreate, response: Response, db: Sessio
         role=user.role,  # NEW: Role (user/admin)
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     # ✅ Generate JWT token
-    access_token = create_access_token(data={"sub": db_user.email, "role": db_user.role.value})
+    access_token = create_access_token(
+        data={"sub": db_user.email, "role": db_user.role.value, "user_id": db_user.id}
+    )
 
     # ✅ Set token as HTTP-only cookie
     response.set_cookie(
@@ -102,17 +185,27 @@ async def register_user(user: schemas.UserCreate, response: Response, db: Sessio
 async def login(
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not models.User.verify_password(form_data.password, user.hashed_password):
+    user = await get_user_by_email(db, form_data.username)
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user.email, "role": user.role.value})
+    # Transparently upgrade hashes created with an older bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    access_token = create_access_token(
+        data={"sub": user.email, "role": user.role.value, "user_id": user.id}
+    )
 
     # ✅ Set the token in an httpOnly cookie
     response.set_cookie(
@@ -148,21 +241,46 @@ async def read_users_me(current_user: models.User = Depends(get_current_user)):
 
 
 @app.get("/search-users")
-async def search_users(email: str, db: Session = Depends(get_db)):
+async def search_users(
+    email: str | None = None,
+    prefix: str | None = None,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Search users by email. Supports partial match.
-    Example usage: /search-users?email=test
+    Search users by email.
+    - /search-users?email=test  -> partial (substring) match, trigram-indexed
+    - /search-users?prefix=te   -> autocomplete on the start of the email, ordered
     """
-    if not email:
+    if prefix:
+        pattern = f"{escape_like(prefix.lower())}%"
+        query = (
+            select(models.User.id, models.User.email)
+            .where(func.lower(models.User.email).like(pattern, escape="\\"))
+            .order_by(func.lower(models.User.email))
+        )
+    elif email:
+        pattern = f"%{escape_like(email)}%"
+        query = select(models.User.id, models.User.email).where(
+            models.User.email.ilike(pattern, escape="\\")
+        )
+    else:
         raise HTTPException(status_code=400, detail="Email parameter is required")
 
-    users = db.query(models.User).filter(models.User.email.ilike(f"%{email}%")).limit(10).all()
+    result = await db.execute(query.limit(limit))
+    users = result.all()
 
     if not users:
         return {"message": "No users found"}
 
     return [{"id": user.id, "email": user.email} for user in users]
 
+
+def escape_like(term: str) -> str:
+    """Treat LIKE wildcards in user input literally."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 @app.post("/logout")
 async def logout(response: Response, request: Request):
     """Invalidate a JWT token and remove the cookie."""
@@ -181,7 +299,7 @@ async def logout(response: Response, request: Request):
 
 @app.post("/validate-token")
 async def validate_token(
-    token_data: TokenValidationRequest, db: Session = Depends(get_db)
+    token_data: TokenValidationRequest, db: AsyncSession = Depends(get_async_db)
 ):
     token = token_data.token
     credentials_exception = HTTPException(
@@ -200,7 +318,7 @@ async def validate_token(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await resolve_user(db, email)
     if user is None:
         raise credentials_exception
 
@@ -213,17 +331,33 @@ async def debug_cookies(request: Request):
 @app.post("/users/query", response_model=list[schemas.UsersQueryResponse])
 async def get_users_by_ids(
     payload: schemas.UsersQueryRequest,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return db.query(models.User).filter(models.User.id.in_(payload.ids)).all()
+    """
+    Batch lookup of users by id. The response carries an ETag; sending it back in
+    If-None-Match returns an empty 304 when none of the users have changed.
+    """
+    result = await db.execute(
+        select(models.User).where(models.User.id.in_(payload.ids)).order_by(models.User.id)
+    )
+    users = [
+        schemas.UsersQueryResponse.model_validate(user).model_dump(mode="json")
+        for user in result.scalars().all()
+    ]
+    body = json.dumps(users, separators=(",", ":")).encode()
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @app.get("/users/{user_id}", response_model=schemas.UserResponse)
-async def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
+async def get_user_by_id(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve user details by user ID.
     """
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return user
\ No newline at end of file
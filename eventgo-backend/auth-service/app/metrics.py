@@ -0,0 +1,39 @@
+from bisect import bisect_left
+from threading import Lock
+
+# Upper bounds in seconds, Prometheus-style (each bucket counts observations <= bound)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Thread-safe latency histogram with fixed buckets."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, seconds)] += 1
+            self._sum += seconds
+            if seconds > self._max:
+                self._max = seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count = sum(self._counts)
+            cumulative, buckets = 0, {}
+            for bound, n in zip(self.buckets, self._counts):
+                cumulative += n
+                buckets[f"le_{bound}"] = cumulative
+            buckets["le_inf"] = count
+            return {
+                "count": count,
+                "sum_seconds": round(self._sum, 6),
+                "avg_seconds": round(self._sum / count, 6) if count else 0.0,
+                "max_seconds": round(self._max, 6),
+                "buckets": buckets,
+            }
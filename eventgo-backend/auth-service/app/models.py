@@ -1,10 +1,8 @@
 from sqlalchemy import Boolean, Column, Integer, String, Enum
-from passlib.context import CryptContext
 from .database import Base
+from .password_hashing import pwd_context
 import enum
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Define a role Enum
 class UserRole(enum.Enum):
     user = "user"
@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import asyncio
+import os
+import time
+
+from passlib.context import CryptContext
+
+from .metrics import Histogram
+
+# The bcrypt cost is picked at startup so one hash takes about BCRYPT_TARGET_MS
+# on the hardware we are running on. BCRYPT_ROUNDS pins it instead.
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", 250))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", 10))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", 16))
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+
+# bcrypt releases the GIL, so a thread pool gives real parallelism without
+# blocking the event loop.
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", os.cpu_count() or 2))
+# Requests allowed to wait for a worker before new ones are turned away with 503.
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", HASH_POOL_WORKERS * 4))
+
+
+def measure_bcrypt_ms(rounds: int, samples: int = 2) -> float:
+    """Best-of-N wall time for one bcrypt hash at the given cost."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+    best = float("inf")
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash("calibration-password")
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float = BCRYPT_TARGET_MS,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+) -> int:
+    """
+    Return the highest bcrypt cost whose hash time stays within target_ms.
+
+    Only the cheapest cost is timed; each extra round doubles the work, so the
+    rest is extrapolated. Never goes below min_rounds.
+    """
+    rounds = min_rounds
+    estimate = measure_bcrypt_ms(min_rounds)
+    while rounds < max_rounds and estimate * 2 <= target_ms:
+        estimate *= 2
+        rounds += 1
+    return rounds
+
+
+def build_context(rounds: int) -> CryptContext:
+    # min_rounds makes needs_update() flag hashes created at a lower cost, so
+    # they are upgraded the next time their owner logs in.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+    )
+
+
+if BCRYPT_ROUNDS:
+    bcrypt_rounds = int(BCRYPT_ROUNDS)
+    print(f"[Auth-Service] Using bcrypt cost {bcrypt_rounds} (pinned by BCRYPT_ROUNDS)")
+else:
+    bcrypt_rounds = calibrate_bcrypt_rounds()
+    print(f"[Auth-Service] Calibrated bcrypt cost {bcrypt_rounds} for a {BCRYPT_TARGET_MS:.0f}ms target")
+pwd_context = build_context(bcrypt_rounds)
+
+
+class HashPoolSaturated(Exception):
+    """Raised when the hashing pool and its queue are both full."""
+
+
+class HashPool:
+    """Bounded executor for password hashing with admission control."""
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.wait_time = Histogram()
+        self.hash_time = Histogram()
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise HashPoolSaturated()
+            self._in_flight += 1
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            self.wait_time.observe(started - submitted)
+            try:
+                return fn(*args)
+            finally:
+                self.hash_time.observe(time.perf_counter() - started)
+
+        future = self._executor.submit(job)
+        # Release the slot when the work finishes, even if the caller went away.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "bcrypt_rounds": bcrypt_rounds,
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": in_flight,
+            "queued": max(0, in_flight - self.workers),
+            "rejected": self.rejected,
+            "wait_time": self.wait_time.snapshot(),
+            "hash_time": self.hash_time.snapshot(),
+        }
+
+
+hash_pool = HashPool()
+
+
+async def hash_password(password: str) -> str:
+    return await hash_pool.run(pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """
+    Verify a password and, if its hash uses an outdated cost, rehash it.
+
+    Returns (valid, new_hash); new_hash is None unless the caller should store it.
+    """
+    return await hash_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
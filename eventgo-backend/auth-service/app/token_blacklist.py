@@ -1,15 +1,178 @@
-from datetime import datetime, timedelta
-from typing import Set
+import hashlib
+import os
+import sqlite3
+import time
+from threading import Lock
 
-# Store invalidated tokens in memory (use Redis in production)
-TOKEN_BLACKLIST: Set[str] = set()
+from jose import JWTError, jwt
+
+# Where logged-out tokens are remembered until they expire:
+#   memory - per-process dict (single worker / tests)
+#   sqlite - a file shared by every worker on the host
+#   redis  - any Redis-protocol server (Redis, KeyDB, Dragonfly, ...)
+TOKEN_BLACKLIST_BACKEND = os.getenv("TOKEN_BLACKLIST_BACKEND", "memory").lower()
+TOKEN_BLACKLIST_SQLITE_PATH = os.getenv("TOKEN_BLACKLIST_SQLITE_PATH", "token_blacklist.db")
+TOKEN_BLACKLIST_REDIS_URL = os.getenv("TOKEN_BLACKLIST_REDIS_URL", "redis://localhost:6379/0")
+
+# Used when a token carries no readable "exp" claim.
+DEFAULT_TOKEN_TTL_SECONDS = 24 * 60 * 60
+BUCKET_SECONDS = 60
+
+
+def token_key(token: str) -> tuple[int, int]:
+    """
+    Return (key, exp) for a token.
+
+    The key is the 64-bit prefix of SHA-256 over the token's ``jti`` (or over the
+    whole token when it has none), so every backend stores a fixed 8 bytes per
+    entry instead of the full JWT.
+    """
+    try:
+        claims = jwt.get_unverified_claims(token)
+    except JWTError:
+        claims = {}
+    identity = claims.get("jti") or token
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)):
+        exp = time.time() + DEFAULT_TOKEN_TTL_SECONDS
+    digest = hashlib.sha256(identity.encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True), int(exp)
+
+
+class MemoryBlacklist:
+    """
+    In-process store. Keys are grouped into per-minute buckets by expiry so that
+    a lookup is a single set membership test and expired entries are dropped a
+    whole bucket at a time.
+    """
+
+    def __init__(self):
+        self._buckets: dict[int, set[int]] = {}
+        self._lock = Lock()
+        self._oldest_bucket = None
+
+    def add(self, key: int, exp: int):
+        bucket = exp // BUCKET_SECONDS
+        with self._lock:
+            self._buckets.setdefault(bucket, set()).add(key)
+            if self._oldest_bucket is None or bucket < self._oldest_bucket:
+                self._oldest_bucket = bucket
+        self.purge_expired()
+
+    def contains(self, key: int, exp: int) -> bool:
+        if exp <= time.time():
+            return False
+        bucket = self._buckets.get(exp // BUCKET_SECONDS)
+        return bucket is not None and key in bucket
+
+    def purge_expired(self, now: float | None = None):
+        current = int(now if now is not None else time.time()) // BUCKET_SECONDS
+        with self._lock:
+            if self._oldest_bucket is None or self._oldest_bucket >= current:
+                return
+            for bucket in [b for b in self._buckets if b < current]:
+                del self._buckets[bucket]
+            self._oldest_bucket = min(self._buckets, default=None)
+
+    def __len__(self):
+        return sum(len(keys) for keys in self._buckets.values())
+
+
+class SQLiteBlacklist:
+    """File-backed store shared by all workers on one host (WAL mode)."""
+
+    PURGE_INTERVAL_SECONDS = 60
+
+    def __init__(self, path: str = TOKEN_BLACKLIST_SQLITE_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS token_blacklist ("
+            " key INTEGER PRIMARY KEY, exp INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_token_blacklist_exp ON token_blacklist (exp)"
+        )
+        self._lock = Lock()
+        self._last_purge = 0.0
+
+    def add(self, key: int, exp: int):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO token_blacklist (key, exp) VALUES (?, ?)", (key, exp)
+            )
+        self.purge_expired()
+
+    def contains(self, key: int, exp: int) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT exp FROM token_blacklist WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def purge_expired(self, now: float | None = None):
+        now = now if now is not None else time.time()
+        if now - self._last_purge < self.PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        with self._lock:
+            self._conn.execute("DELETE FROM token_blacklist WHERE exp <= ?", (int(now),))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM token_blacklist").fetchone()[0]
+
+
+class RedisBlacklist:
+    """Store in a Redis-protocol server; the server expires keys at the token's exp."""
+
+    PREFIX = "auth:blacklist:"
+
+    def __init__(self, url: str = TOKEN_BLACKLIST_REDIS_URL):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "TOKEN_BLACKLIST_BACKEND=redis requires the 'redis' package"
+            ) from e
+        self._client = redis.Redis.from_url(url)
+
+    def add(self, key: int, exp: int):
+        if exp > time.time():
+            self._client.set(f"{self.PREFIX}{key:x}", 1, exat=exp)
+
+    def contains(self, key: int, exp: int) -> bool:
+        return bool(self._client.exists(f"{self.PREFIX}{key:x}"))
+
+    def purge_expired(self, now: float | None = None):
+        """Expiry is handled by the server."""
+
+    def __len__(self):
+        return sum(1 for _ in self._client.scan_iter(f"{self.PREFIX}*"))
+
+
+BACKENDS = {
+    "memory": MemoryBlacklist,
+    "sqlite": SQLiteBlacklist,
+    "redis": RedisBlacklist,
+}
+
+
+def create_blacklist(backend: str = TOKEN_BLACKLIST_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown TOKEN_BLACKLIST_BACKEND: {backend}")
+    return BACKENDS[backend]()
+
+
+TOKEN_BLACKLIST = create_blacklist()
 
 
 def add_to_blacklist(token: str):
-    """Add a token to the blacklist."""
-    TOKEN_BLACKLIST.add(token)
+    """Add a token to the blacklist until it expires."""
+    TOKEN_BLACKLIST.add(*token_key(token))
 
 
 def is_token_blacklisted(token: str) -> bool:
     """Check if a token is blacklisted."""
-    return token in TOKEN_BLACKLIST
+    return TOKEN_BLACKLIST.contains(*token_key(token))
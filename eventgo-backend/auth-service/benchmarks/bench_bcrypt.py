@@ -0,0 +1,60 @@
+"""
+bcrypt throughput at each cost factor.
+
+Reports single-threaded hash time and hashes/sec per core when every core is
+busy, which is what the login pool sees under load. Use it to choose
+BCRYPT_TARGET_MS / BCRYPT_ROUNDS for a deployment.
+
+    python benchmarks/bench_bcrypt.py --min-rounds 8 --max-rounds 14
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the parent directory to the path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("BCRYPT_ROUNDS", "4")  # skip calibration on import
+from app.password_hashing import calibrate_bcrypt_rounds, measure_bcrypt_ms
+
+import bcrypt
+
+
+def hash_many(rounds: int, count: int) -> int:
+    salt = bcrypt.gensalt(rounds)
+    for _ in range(count):
+        bcrypt.hashpw(b"benchmark-password", salt)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rounds", type=int, default=8)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--seconds", type=float, default=2.0, help="approximate time per cost factor")
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"cores: {cores}")
+    print(f"{'cost':>4} {'ms/hash':>10} {'hashes/s (1 core)':>18} {'hashes/s/core (all busy)':>25}")
+
+    with ProcessPoolExecutor(max_workers=cores) as pool:
+        for rounds in range(args.min_rounds, args.max_rounds + 1):
+            single_ms = measure_bcrypt_ms(rounds, samples=3)
+            per_worker = max(1, int(args.seconds * 1000 / single_ms))
+            started = time.perf_counter()
+            total = sum(pool.map(hash_many, [rounds] * cores, [per_worker] * cores))
+            elapsed = time.perf_counter() - started
+            print(
+                f"{rounds:>4} {single_ms:>10.1f} {1000 / single_ms:>18.1f} "
+                f"{total / elapsed / cores:>25.1f}"
+            )
+
+    print(f"calibrated cost for {args.target_ms:.0f}ms: {calibrate_bcrypt_rounds(args.target_ms, args.min_rounds)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Memory and lookup benchmark for the token blacklist backends.
+
+Simulates N logouts of tokens whose expiry is spread over one token lifetime,
+then reports the resident memory growth and lookup latency.
+
+    python benchmarks/bench_token_blacklist.py --count 10000000
+    python benchmarks/bench_token_blacklist.py --backend sqlite --count 1000000
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import token_blacklist
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (falls back to peak RSS off Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=sorted(token_blacklist.BACKENDS), default="memory")
+    parser.add_argument("--count", type=int, default=10_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--lifetime-minutes", type=int, default=60, help="token lifetime (ACCESS_TOKEN_EXPIRE_MINUTES)")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        path = os.path.join(tempfile.mkdtemp(), "blacklist.db")
+        store = token_blacklist.SQLiteBlacklist(path)
+    else:
+        store = token_blacklist.create_blacklist(args.backend)
+
+    lifetime = args.lifetime_minutes * 60
+    now = int(time.time())
+    rng = random.Random(42)
+    keys = []
+
+    baseline = rss_mb()
+    started = time.perf_counter()
+    for i in range(args.count):
+        key = rng.getrandbits(64) - (1 << 63)
+        # Offset so entries do not expire while the benchmark is still running
+        exp = now + 300 + (i * lifetime) // args.count
+        store.add(key, exp)
+        if i % max(1, args.count // args.lookups) == 0:
+            keys.append((key, exp))
+    insert_seconds = time.perf_counter() - started
+    grown = rss_mb() - baseline
+
+    started = time.perf_counter()
+    for key, exp in keys:
+        assert store.contains(key, exp)
+    hit_us = (time.perf_counter() - started) / len(keys) * 1e6
+
+    started = time.perf_counter()
+    for _ in range(len(keys)):
+        store.contains(rng.getrandbits(64) - (1 << 63), now + lifetime // 2)
+    miss_us = (time.perf_counter() - started) / len(keys) * 1e6
+
+    print(f"backend:            {args.backend}")
+    print(f"logouts:            {args.count:,}")
+    print(f"insert rate:        {args.count / insert_seconds:,.0f}/s")
+    print(f"RSS growth:         {grown:,.1f} MB ({grown * 1024 * 1024 / args.count:,.1f} bytes/entry)")
+    print(f"lookup (hit):       {hit_us:.2f} us")
+    print(f"lookup (miss):      {miss_us:.2f} us")
+
+    # Everything issued above has expired one lifetime later.
+    store.purge_expired(now + 300 + lifetime + token_blacklist.BUCKET_SECONDS * 2)
+    print(f"entries after exp:  {len(store):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+HTTP load test for auth-service's database-backed endpoints.
+
+Registers a user, then hammers /validate-token, /users/{id} and /users/query
+with a fixed number of concurrent clients and reports requests/sec and latency.
+
+Against a running service (e.g. docker compose, Postgres):
+
+    python benchmarks/load_test.py --url http://localhost:8001
+
+Self-contained, starting uvicorn on a throwaway SQLite (+aiosqlite) database:
+
+    python benchmarks/load_test.py --workers 1
+
+Run it on the commit before the AsyncSession change and after it to compare.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_local_service(port: int, workers: int) -> subprocess.Popen:
+    db_path = os.path.join(tempfile.mkdtemp(prefix="auth-load-"), "auth.db")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        BCRYPT_ROUNDS="4",
+        TOKEN_VALIDATION_MODE="db",
+    )
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=SERVICE_DIR,
+        env=env,
+    )
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("auth-service did not become healthy")
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+        await wait_until_up(client)
+        email = f"load-{uuid.uuid4().hex[:8]}@example.com"
+        registered = await client.post(
+            "/register", json={"email": email, "full_name": "Load Test", "password": "load-test-pw"}
+        )
+        registered.raise_for_status()
+        token = registered.json()["access_token"]
+        user_id = (await client.post("/validate-token", json={"token": token})).json()["id"]
+
+        requests = [
+            lambda: client.post("/validate-token", json={"token": token}),
+            lambda: client.get(f"/users/{user_id}"),
+            lambda: client.post("/users/query", json={"ids": [user_id]}),
+        ]
+        latencies, errors = [], 0
+        deadline = time.monotonic() + args.duration
+
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                response = await requests[i % len(requests)]()
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+                i += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"concurrency:  {args.concurrency}")
+    print(f"requests:     {len(latencies):,} ({errors} errors)")
+    print(f"throughput:   {len(latencies) / elapsed:,.1f} req/s")
+    print(f"latency p50:  {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"latency p99:  {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running auth-service")
+    parser.add_argument("--port", type=int, default=8765, help="port for the self-started service")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the self-started service")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    args = parser.parse_args()
+
+    process = None
+    if not args.url:
+        process = start_local_service(args.port, args.workers)
+        args.url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(run(args))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
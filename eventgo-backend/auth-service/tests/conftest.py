@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# The app connects at import time, so point it at a throwaway SQLite file first.
+_db_dir = tempfile.mkdtemp(prefix="auth-service-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'auth.db')}")
+# Skip cost calibration and keep hashing cheap
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+# Add the parent directory to the path so we can import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,222 @@
+from fastapi.testclient import TestClient
+import json
+import time
+import uuid
+
+from app import dependencies, password_hashing
+from app.database import SessionLocal
+from app.main import app
+from app import models
+from app.token_blacklist import BUCKET_SECONDS, MemoryBlacklist
+from app.user_cache import user_cache
+
+client = TestClient(app)
+
+
+def register(email=None, password="secret123"):
+    email = email or f"{uuid.uuid4().hex[:10]}@example.com"
+    response = client.post(
+        "/register",
+        json={"email": email, "full_name": "Test User", "password": password},
+    )
+    assert response.status_code == 200
+    return email, response.json()["access_token"]
+
+
+def test_validate_token_db_mode(monkeypatch):
+    """In db mode every validation reads the users table."""
+    monkeypatch.setattr(dependencies, "TOKEN_VALIDATION_MODE", "db")
+    email, token = register()
+
+    response = client.post("/validate-token", json={"token": token})
+
+    assert response.status_code == 200
+    assert response.json()["email"] == email
+
+
+def test_validate_token_stateless_mode_uses_cache(monkeypatch):
+    """Stateless mode only misses once, then serves the user from the cache."""
+    monkeypatch.setattr(dependencies, "TOKEN_VALIDATION_MODE", "stateless")
+    user_cache.clear()
+    email, token = register()
+    before = user_cache.stats()
+
+    for _ in range(3):
+        response = client.post("/validate-token", json={"token": token})
+        assert response.status_code == 200
+        assert response.json()["email"] == email
+
+    after = user_cache.stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 2
+
+
+def test_user_update_invalidates_cache(monkeypatch):
+    """Writing the user row evicts its cached copy."""
+    monkeypatch.setattr(dependencies, "TOKEN_VALIDATION_MODE", "stateless")
+    email, token = register()
+    client.post("/validate-token", json={"token": token})
+    assert user_cache.get(email) is not None
+
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == email).first()
+        user.full_name = "Renamed User"
+        db.commit()
+    finally:
+        db.close()
+
+    assert user_cache.get(email) is None
+
+
+def test_metrics_reports_user_cache():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert {"hits", "misses", "size"} <= set(response.json()["user_cache"])
+
+
+def test_logout_blacklists_token_until_expiry():
+    email, token = register()
+    client.cookies.set("access_token", f"Bearer {token}")
+    try:
+        assert client.post("/logout").status_code == 200
+    finally:
+        client.cookies.clear()
+
+    response = client.post("/validate-token", json={"token": token})
+    assert response.status_code == 401
+
+
+def test_blacklist_drops_expired_entries():
+    store = MemoryBlacklist()
+    exp = int(time.time()) + 600
+    store.add(1234, exp)
+    assert store.contains(1234, exp)
+
+    store.purge_expired(exp + BUCKET_SECONDS * 2)
+    assert len(store) == 0
+
+
+def login(email, password="secret123"):
+    return client.post("/login", data={"username": email, "password": password})
+
+
+def test_login_hashes_off_the_event_loop():
+    email, _ = register()
+    before = password_hashing.hash_pool.stats()["hash_time"]["count"]
+
+    response = login(email)
+
+    assert response.status_code == 200
+    assert password_hashing.hash_pool.stats()["hash_time"]["count"] == before + 1
+
+
+def test_login_returns_503_when_hash_pool_is_saturated(monkeypatch):
+    email, _ = register()
+    pool = password_hashing.hash_pool
+    monkeypatch.setattr(pool, "_in_flight", pool.workers + pool.queue_limit)
+    rejected = pool.rejected
+
+    response = login(email)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert pool.rejected == rejected + 1
+
+
+def test_login_upgrades_outdated_bcrypt_cost(monkeypatch):
+    email, _ = register()
+    monkeypatch.setattr(password_hashing, "pwd_context", password_hashing.build_context(5))
+
+    assert login(email).status_code == 200
+
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == email).first()
+        assert user.hashed_password.startswith("$2b$05$")
+    finally:
+        db.close()
+    assert login(email).status_code == 200
+
+
+def test_me_returns_current_user():
+    email, token = register()
+    client.cookies.set("access_token", f"Bearer {token}")
+    try:
+        response = client.get("/me")
+    finally:
+        client.cookies.clear()
+
+    assert response.status_code == 200
+    assert response.json()["email"] == email
+
+
+def test_search_users_prefix_and_substring():
+    tag = uuid.uuid4().hex[:8]
+    register(f"zz{tag}alice@example.com")
+    register(f"zz{tag}bob@example.com")
+    register(f"other{tag}@example.com")
+
+    prefix = client.get("/search-users", params={"prefix": f"ZZ{tag}"}).json()
+    assert [u["email"] for u in prefix] == [f"zz{tag}alice@example.com", f"zz{tag}bob@example.com"]
+
+    substring = client.get("/search-users", params={"email": tag}).json()
+    assert len(substring) == 3
+
+
+def test_search_users_treats_wildcards_literally():
+    assert client.get("/search-users", params={"prefix": "%"}).json() == {"message": "No users found"}
+    assert client.get("/search-users").status_code == 400
+
+
+def test_users_keyset_pagination_walks_every_user():
+    for _ in range(3):
+        register()
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["after_id"] = cursor
+        response = client.get("/users", params=params)
+        assert response.status_code == 200
+        seen.extend(user["id"] for user in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) >= 3
+
+
+def test_users_stream_is_ndjson():
+    register()
+    response = client.get("/users/stream")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert users and {"id", "email", "role"} <= set(users[0])
+    assert [u["id"] for u in users] == sorted(u["id"] for u in users)
+
+
+def test_users_query_supports_etags():
+    email, token = register()
+    user_id = client.post("/validate-token", json={"token": token}).json()["id"]
+
+    first = client.post("/users/query", json={"ids": [user_id]})
+    assert first.status_code == 200
+    assert first.json()[0]["email"] == email
+    etag = first.headers["ETag"]
+
+    again = client.post("/users/query", json={"ids": [user_id]}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_metrics_reports_db_pool():
+    client.get("/users", params={"limit": 1})
+    pool = client.get("/metrics").json()["db_pool"]["async"]
+    assert pool["checkouts"] >= 1
+    assert pool["checked_out"] == 0
+    assert pool["wait_time"]["count"] >= pool["checkouts"]
+    assert {"pool_size", "overflow", "pre_ping_failures", "timeouts"} <= set(pool)
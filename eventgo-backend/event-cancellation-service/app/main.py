@@ -5,6 +5,7 @@ from collections import defaultdict
 from fastapi import FastAPI
 from pydantic import BaseModel
 from app.rabbitmq import publish_notification
+from app.user_client import user_client
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 app = FastAPI(title="Event Cancellation Service")
@@ -58,10 +59,9 @@ async def cancel_event(event_id: int):
             if pid:
                 grouped[str(pid)].append(rec)
 
+        # Chunked /users/query calls, so large events do not send one giant id list
         user_ids = list({r["user_id"] for recs in grouped.values() for r in recs})
-        users_resp = await client.post(f"{AUTH_URL}/users/query", json={"ids": user_ids})
-        users_resp.raise_for_status()
-        users = {u["id"]: u for u in users_resp.json()}
+        users = await user_client.get_users(user_ids)
 
         tasks = [process_group(client, pid, recs, users[recs[0]["user_id"]], event) for pid, recs in grouped.items()]
         results = await asyncio.gather(*tasks)
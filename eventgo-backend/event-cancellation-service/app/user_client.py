@@ -0,0 +1,178 @@
+"""
+Batched, cached client for auth-service user profiles.
+
+Lookups issued within USER_CLIENT_BATCH_WINDOW_MS of each other are coalesced
+into one POST /users/query (split into chunks of at most USER_CLIENT_MAX_BATCH
+ids), DataLoader style. Results are kept in a TTL cache, and refreshing a chunk
+sends If-None-Match so an unchanged answer comes back as an empty 304.
+
+The same module is copied into every service that reads users from auth-service.
+"""
+from collections import OrderedDict
+import asyncio
+import os
+import time
+
+import httpx
+
+AUTH_URL = os.getenv("AUTH_API_URL", "http://auth-service:8000")
+USER_CLIENT_BATCH_WINDOW_MS = float(os.getenv("USER_CLIENT_BATCH_WINDOW_MS", 5))
+USER_CLIENT_MAX_BATCH = int(os.getenv("USER_CLIENT_MAX_BATCH", 200))
+USER_CLIENT_CACHE_TTL_SECONDS = float(os.getenv("USER_CLIENT_CACHE_TTL_SECONDS", 60))
+USER_CLIENT_CACHE_MAX_SIZE = int(os.getenv("USER_CLIENT_CACHE_MAX_SIZE", 10000))
+
+
+class UserClient:
+    def __init__(
+        self,
+        base_url: str = AUTH_URL,
+        window_ms: float = USER_CLIENT_BATCH_WINDOW_MS,
+        max_batch: int = USER_CLIENT_MAX_BATCH,
+        ttl: float = USER_CLIENT_CACHE_TTL_SECONDS,
+        max_size: int = USER_CLIENT_CACHE_MAX_SIZE,
+        timeout: float = 10,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.base_url = base_url
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.ttl = ttl
+        self.max_size = max_size
+        self.timeout = timeout
+        self._transport = transport
+        self._http: httpx.AsyncClient | None = None
+        # user_id -> (expires_at, user)
+        self._cache: "OrderedDict[int, tuple[float, dict]]" = OrderedDict()
+        # sorted chunk of ids -> (etag, users) from the last 200 response
+        self._etags: "OrderedDict[tuple, tuple[str, list]]" = OrderedDict()
+        self._etag_ids = 0
+        # user_id -> future shared by every caller waiting on that id
+        self._pending: dict[int, asyncio.Future] = {}
+        self._queued: list[int] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.stats = {
+            "cache_hits": 0,
+            "coalesced": 0,
+            "fetched_ids": 0,
+            "requests": 0,
+            "not_modified": 0,
+        }
+
+    async def get_user(self, user_id: int) -> dict | None:
+        """Return one user, or None if auth-service does not know the id."""
+        return (await self.get_users([user_id])).get(int(user_id))
+
+    async def get_users(self, user_ids) -> dict[int, dict]:
+        """Return {id: user} for the given ids; unknown ids are left out."""
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        found: dict[int, dict] = {}
+        waiting: dict[int, asyncio.Future] = {}
+
+        for user_id in {int(i) for i in user_ids}:
+            cached = self._cache.get(user_id)
+            if cached and cached[0] > now:
+                self._cache.move_to_end(user_id)
+                found[user_id] = cached[1]
+                self.stats["cache_hits"] += 1
+            elif user_id in self._pending:
+                waiting[user_id] = self._pending[user_id]
+                self.stats["coalesced"] += 1
+            else:
+                future = loop.create_future()
+                self._pending[user_id] = future
+                self._queued.append(user_id)
+                waiting[user_id] = future
+
+        if self._queued:
+            if len(self._queued) >= self.max_batch:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+
+        if waiting:
+            # shield: one caller being cancelled must not cancel a lookup others share
+            results = await asyncio.gather(*(asyncio.shield(f) for f in waiting.values()))
+            for user_id, user in zip(waiting, results):
+                if user is not None:
+                    found[user_id] = user
+        return found
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        queued, self._queued = self._queued, []
+        for start in range(0, len(queued), self.max_batch):
+            task = asyncio.ensure_future(self._fetch(queued[start:start + self.max_batch]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, chunk: list[int]):
+        key = tuple(sorted(chunk))
+        headers = {}
+        if key in self._etags:
+            headers["If-None-Match"] = self._etags[key][0]
+        try:
+            response = await self._client().post("/users/query", json={"ids": list(key)}, headers=headers)
+            self.stats["requests"] += 1
+            if response.status_code == 304 and key in self._etags:
+                self.stats["not_modified"] += 1
+                users = self._etags[key][1]
+            else:
+                response.raise_for_status()
+                users = response.json()
+                if response.headers.get("ETag"):
+                    self._remember_etag(key, response.headers["ETag"], users)
+            self.stats["fetched_ids"] += len(chunk)
+        except Exception as e:
+            for user_id in chunk:
+                future = self._pending.pop(user_id)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_id = {user["id"]: user for user in users}
+        expires_at = time.monotonic() + self.ttl
+        for user_id in chunk:
+            user = by_id.get(user_id)
+            if user is not None:
+                self._store(user_id, expires_at, user)
+            future = self._pending.pop(user_id)
+            if not future.done():
+                future.set_result(user)
+
+    def _store(self, user_id: int, expires_at: float, user: dict):
+        self._cache[user_id] = (expires_at, user)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def _remember_etag(self, key: tuple, etag: str, users: list):
+        if key not in self._etags:
+            self._etag_ids += len(key)
+        self._etags[key] = (etag, users)
+        self._etags.move_to_end(key)
+        # Bounded by the number of ids remembered, like the user cache
+        while self._etag_ids > self.max_size and len(self._etags) > 1:
+            old_key, _ = self._etags.popitem(last=False)
+            self._etag_ids -= len(old_key)
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, transport=self._transport
+            )
+        return self._http
+
+    def invalidate(self, user_id: int):
+        self._cache.pop(int(user_id), None)
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+user_client = UserClient()
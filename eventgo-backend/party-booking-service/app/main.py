@@ -8,6 +8,7 @@ import requests
 import json
 import pika
 from . import schemas
+from .user_client import user_client
 from dotenv import load_dotenv
 import pika
 import json
@@ -80,7 +81,7 @@ def publish_message(message, routing_key=NOTIFICATION_ROUTING_KEY):
         print(f"Failed to publish message: {str(e)}")
         return False
     
-def send_refund_notification(user_id: int, event_id: int, ticket_id: int, amount_cents: int, reason: str = ""):
+async def send_refund_notification(user_id: int, event_id: int, ticket_id: int, amount_cents: int, reason: str = ""):
     """
     Send a notification when a refund is processed
     
@@ -92,13 +93,11 @@ def send_refund_notification(user_id: int, event_id: int, ticket_id: int, amount
         reason: Optional reason for refund
     """
     try:
-        # Get user information
-        user_response = requests.get(f"{AUTH_URL}/users/{user_id}")
-        if user_response.status_code != 200:
+        # Get user information (batched and cached across concurrent notifications)
+        user = await user_client.get_user(user_id)
+        if user is None:
             print(f"Failed to get user information for ID {user_id}")
             return False
-            
-        user = user_response.json()
         
         # Get event information
         event_response = requests.get(f"{EVENTS_URL}/events/{event_id}")
@@ -158,8 +157,8 @@ def send_refund_notification(user_id: int, event_id: int, ticket_id: int, amount
         return False
 
 
-def send_payment_notification(user_id: int, event_id: int, ticket_id: int, amount_cents: int, url: str, subject_prefix: str):
-    user = requests.get(f"{AUTH_URL}/users/{user_id}").json()
+async def send_payment_notification(user_id: int, event_id: int, ticket_id: int, amount_cents: int, url: str, subject_prefix: str):
+    user = await user_client.get_user(user_id)
     event = requests.get(f"{EVENTS_URL}/events/{event_id}").json().get("EventAPI", {})
 
     formatted_date = datetime.fromisoformat(event["date"].replace("Z","+00:00")).strftime("%B %d, %Y at %I:%M %p")
@@ -192,6 +191,7 @@ async def refund_split(ticketList: list[int], sleepTime: int):
             needToRefund = True
             break
     if needToRefund:
+        notifications = []
         for ticket in tickets:
             try:
                 if ticket.get("status") == "sold" and ticket.get("preference") == "refund":
@@ -207,16 +207,19 @@ async def refund_split(ticketList: list[int], sleepTime: int):
                     toRefund.append(ticket_id)
                     user_id = ticket.get("userId")
                     event_id = ticket.get("eventId")
-                    send_refund_notification(
+                    notifications.append(send_refund_notification(
                             user_id=user_id,
                             event_id=event_id,
                             ticket_id=ticket_id,
                             amount_cents=refund_data.get("amount", 0),  # Use amount from refund response
                             reason="Group booking cancelled - some participants did not complete payment"
-                        )
+                        ))
             except Exception as e:
                 print(f"Unexpected error: {str(e)}")
                 return {"status": "error", "message": f"Unexpected error: {str(e)}"}
+
+        # Sent together so the user lookups are coalesced into one auth-service call
+        await asyncio.gather(*notifications)
         
         try:
             print("[PROCESS] Calling cancellation now")
@@ -382,7 +385,7 @@ async def stripe_webhook(request: Request):
                     # Publish to notification queue
                     # publish_success = publish_message(payload)
 
-                    send_payment_notification(
+                    await send_payment_notification(
                         user_id=user_id,
                         event_id=session.metadata["event_id"],
                         ticket_id=session.metadata["ticket_id"],
@@ -461,6 +464,7 @@ async def party_booking(request: schemas.PartyBookingRequest, background_tasks:
         payment_link_objects = payment_links_response.json()
         
         res = {}
+        notifications = []
         # Access the payment_links array correctly
         for payment_link_obj in payment_link_objects.get("payment_links", []):
             if payment_link_obj.get('participant_email') == leader:
@@ -483,16 +487,19 @@ async def party_booking(request: schemas.PartyBookingRequest, background_tasks:
                 #     }
                 # publish_message(payload)
 
-                send_payment_notification(
+                notifications.append(send_payment_notification(
                     user_id=payment_link_obj["user_id"],
                     event_id=event_id,
                     ticket_id=payment_link_obj["ticket_id"],
                     amount_cents=payment_link_obj["amount"],
                     url=payment_link_obj["url"],
                     subject_prefix="Action Required: Complete Your Payment"
-                )
+                ))
                                 
-                print(f"Published payment link for {payment_link_obj.get('participant_email')} to notification queue")
+                print(f"Queued payment link notification for {payment_link_obj.get('participant_email')}")
+
+        # One coalesced /users/query for every participant instead of one GET each
+        await asyncio.gather(*notifications)
 
         background_tasks.add_task(refund_split, ticket_ids, 75)
         return {"status": "ok", "data": res}
@@ -5,6 +5,7 @@ import requests
 import json
 import uuid
 from . import schemas
+from .user_client import user_client
 from dotenv import load_dotenv
 import pika
 import json
@@ -310,9 +311,7 @@ async def transfer(request: schemas.TicketTransferRequest):
 
         # Fetch full user profiles
         user_ids = [int(request.buyer_id), int(request.seller_id)]
-        users_resp = requests.post(f"{AUTH_URL}/users/query", json={"ids": user_ids})
-        users_resp.raise_for_status()
-        users = {u["id"]: u for u in users_resp.json()}
+        users = await user_client.get_users(user_ids)
 
         formatted_date = datetime.fromisoformat(event.get("date").replace("Z", "+00:00")).strftime("%B %d, %Y at %I:%M %p")
         seat_number = ticket_info.get("seat_number", str(request.ticket_id))